@@ -9,44 +9,141 @@ PDF to WebP Converter
 import argparse
 import io
 import logging
+import logging.handlers
+import math
+import os
+import queue
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
 
-try:
-    import fitz  # PyMuPDF
-    from PIL import Image
-except ImportError as e:
-    print("❌ Не установлены необходимые библиотеки!")
-    print("\nДля установки выполните:")
-    print("pip install PyMuPDF Pillow")
-    sys.exit(1)
+# Тяжелые зависимости загружаются в _lazy_imports(), чтобы --help
+# и ошибки аргументов не ждали импорта PyMuPDF и Pillow
+fitz = None  # PyMuPDF
+Image = None
+np = None
+webp = None
 
 
 # Константы
 DEFAULT_DPI = 300
 DEFAULT_QUALITY = 90
 DEFAULT_ZOOM_BASE = 72.0
-WEBP_METHOD = 6
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+DEFAULT_METHOD = 4
+MIN_PAGES_FOR_PARALLEL = 4
+PROGRESS_LOG_INTERVAL = 50
+LOG_BUFFER_CAPACITY = 64
+ENCODE_THREADS = 2
+MAX_PENDING_BYTES = 128 * 1024 * 1024
+WRITE_QUEUE_SIZE = 2 * ENCODE_THREADS
+EMBEDDED_DPI_SAFETY_FACTOR = 1.2
+SCAN_COVERAGE_THRESHOLD = 0.9
+MAX_PIXMAP_BYTES = 128 * 1024 * 1024
+STRIP_PIXMAP_BYTES = 16 * 1024 * 1024
+
+# Настройка логирования: подробные DEBUG записи по каждой странице буферизуются
+# и выводятся пачками, INFO и выше выводятся сразу (вместе с накопленным буфером)
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
-)
+))
+logging.getLogger().addHandler(logging.handlers.MemoryHandler(
+    capacity=LOG_BUFFER_CAPACITY,
+    flushLevel=logging.INFO,
+    target=_log_stream_handler
+))
+logging.getLogger().setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Флаг процесса пакетного пула: после Ctrl+C процесс не берет новые файлы
+# из очереди пула, которые executor уже передал ему и не может отменить
+_batch_interrupted = False
+
+
+def _flush_logs() -> None:
+    """
+    Выводит накопленные записи лога.
+
+    Вызывается перед выводом в stdout и в конце работы дочерних процессов,
+    которые завершаются без atexit и иначе потеряли бы буфер.
+    """
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+
+def _init_worker(log_level: int) -> None:
+    """
+    Настраивает дочерний процесс пула.
+
+    При запуске через spawn модуль импортируется заново и уровень лога
+    сбрасывается на INFO, поэтому уровень родителя (-v) передается явно.
+
+    Args:
+        log_level: Уровень корневого логгера родительского процесса.
+    """
+    logging.getLogger().setLevel(log_level)
+
+
+class PdfFileEntry(NamedTuple):
+    """Найденный PDF файл с размером, полученным при чтении директории."""
+
+    name: str
+    size: int
+    path: Path
+
+
+def _lazy_imports() -> None:
+    """
+    Импортирует PyMuPDF, Pillow и опциональный пакет webp при первом вызове.
+
+    Вызывается в начале конвертации, в том числе в дочерних процессах,
+    запущенных без fork, где модуль импортируется заново.
+    """
+    global fitz, Image, np, webp
+
+    if fitz is not None:
+        return
+
+    try:
+        import fitz as _fitz  # PyMuPDF
+        from PIL import Image as _Image
+    except ImportError:
+        print("❌ Не установлены необходимые библиотеки!")
+        print("\nДля установки выполните:")
+        print("pip install PyMuPDF Pillow")
+        sys.exit(1)
+
+    fitz, Image = _fitz, _Image
 
-def find_pdf_files(directory: Path) -> List[Path]:
+    try:
+        # Опционально: прямое lossless кодирование через libwebp без Pillow
+        import numpy as _np
+        import webp as _webp
+    except ImportError:
+        return
+
+    np, webp = _np, _webp
+
+
+def find_pdf_files(directory: Path) -> List[PdfFileEntry]:
     """
     Находит все PDF файлы в указанной директории.
 
+    Директория читается одним проходом os.scandir: тип файла берется
+    из DirEntry без системного вызова, а stat для размера выполняется только
+    для PDF файлов (на Windows он тоже берется из результатов чтения).
+    Расширение сравнивается с учетом регистра, как в glob("*.pdf"): иначе
+    doc.pdf и doc.PDF попали бы в одну выходную директорию doc_webp.
+
     Args:
         directory: Путь к директории для поиска.
 
     Returns:
-        Список путей к найденным PDF файлам, отсортированный по имени.
+        Список найденных PDF файлов, отсортированный по имени.
 
     Raises:
         ValueError: Если переданный путь не является директорией.
@@ -54,17 +151,23 @@ def find_pdf_files(directory: Path) -> List[Path]:
     if not directory.is_dir():
         raise ValueError(f"Путь не является директорией: {directory}")
 
-    pdf_files = sorted(directory.glob("*.pdf"))
+    with os.scandir(directory) as entries:
+        pdf_files = [
+            PdfFileEntry(entry.name, entry.stat().st_size, Path(entry.path))
+            for entry in entries
+            if entry.name.endswith('.pdf') and entry.is_file()
+        ]
+    pdf_files.sort(key=lambda pdf_file: pdf_file.name)
     logger.debug(f"Найдено PDF файлов в {directory}: {len(pdf_files)}")
     return pdf_files
 
 
-def interactive_file_selection(pdf_files: List[Path]) -> Path:
+def interactive_file_selection(pdf_files: List[PdfFileEntry]) -> Path:
     """
     Предоставляет интерактивный выбор PDF файла из списка.
 
     Args:
-        pdf_files: Список путей к PDF файлам.
+        pdf_files: Список PDF файлов от find_pdf_files.
 
     Returns:
         Выбранный путь к PDF файлу.
@@ -76,10 +179,11 @@ def interactive_file_selection(pdf_files: List[Path]) -> Path:
     if not pdf_files:
         raise ValueError("Список PDF файлов пуст")
 
+    _flush_logs()
     print("\nНайдено несколько PDF файлов:")
     print("-" * 60)
     for idx, pdf_file in enumerate(pdf_files, start=1):
-        file_size = pdf_file.stat().st_size / (1024 * 1024)  # MB
+        file_size = pdf_file.size / (1024 * 1024)  # MB
         print(f"  {idx}. {pdf_file.name} ({file_size:.2f} MB)")
     print("-" * 60)
 
@@ -92,7 +196,7 @@ def interactive_file_selection(pdf_files: List[Path]) -> Path:
 
             choice_num = int(choice)
             if 1 <= choice_num <= len(pdf_files):
-                selected_file = pdf_files[choice_num - 1]
+                selected_file = pdf_files[choice_num - 1].path
                 logger.info(f"Выбран файл: {selected_file.name}")
                 return selected_file
             else:
@@ -104,13 +208,20 @@ def interactive_file_selection(pdf_files: List[Path]) -> Path:
             raise
 
 
-def validate_parameters(dpi: int, quality: int) -> None:
+def validate_parameters(
+    dpi: int,
+    quality: int,
+    method: int = DEFAULT_METHOD,
+    jobs: Optional[int] = None
+) -> None:
     """
     Валидирует параметры конвертации.
 
     Args:
         dpi: Разрешение в DPI.
         quality: Качество WebP от 0 до 100.
+        method: Метод сжатия WebP от 0 (быстро) до 6 (медленно, меньше размер).
+        jobs: Число параллельных процессов или None для числа ядер.
 
     Raises:
         ValueError: Если параметры выходят за допустимые пределы.
@@ -121,13 +232,484 @@ def validate_parameters(dpi: int, quality: int) -> None:
     if quality < 0 or quality > 100:
         raise ValueError(f"Качество должно быть в диапазоне 0-100, получено: {quality}")
 
+    if method < 0 or method > 6:
+        raise ValueError(f"Метод сжатия должен быть в диапазоне 0-6, получено: {method}")
+
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"Число процессов должно быть не меньше 1, получено: {jobs}")
+
+
+def _effective_zoom(page: "fitz.Page", zoom: float) -> float:
+    """
+    Ограничивает масштаб рендеринга разрешением встроенного скана.
+
+    Если страница является сканом (изображение покрывает почти всю страницу),
+    рендеринг с DPI выше разрешения самого изображения не добавляет деталей,
+    а только увеличивает время и объем данных. Ограничение не применяется,
+    если поверх изображения есть видимый текст или векторная графика: они
+    рендерятся четче на полном DPI. Невидимый текстовый слой OCR не мешает.
+
+    Args:
+        page: Страница PDF документа.
+        zoom: Запрошенный коэффициент масштабирования относительно 72 DPI.
+
+    Returns:
+        Коэффициент масштабирования, не превышающий запрошенный.
+    """
+    page_area = abs(page.rect)
+    if page_area == 0:
+        return zoom
+
+    embedded_dpi = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        if bbox.is_empty or abs(bbox) < page_area * SCAN_COVERAGE_THRESHOLD:
+            continue
+        image_dpi = max(
+            info["width"] * DEFAULT_ZOOM_BASE / bbox.width,
+            info["height"] * DEFAULT_ZOOM_BASE / bbox.height
+        )
+        embedded_dpi = max(embedded_dpi, image_dpi)
+
+    if embedded_dpi == 0.0:
+        return zoom
+
+    # Проверки дороже get_image_info, поэтому выполняются только для сканов.
+    # Режим отрисовки 3 - невидимый текст, 7 - текст только как обтравка.
+    if any(span["type"] not in (3, 7) for span in page.get_texttrace()):
+        return zoom
+    if page.get_drawings():
+        return zoom
+
+    capped_dpi = max(embedded_dpi * EMBEDDED_DPI_SAFETY_FACTOR, DEFAULT_ZOOM_BASE)
+    return min(zoom, capped_dpi / DEFAULT_ZOOM_BASE)
+
+
+def _zoom_matrix(zoom: float) -> "fitz.Matrix":
+    """
+    Создает матрицу масштабирования для рендеринга.
+
+    При 72 DPI возвращается fitz.Identity, чтобы MuPDF не выполнял
+    лишнее аффинное преобразование.
+
+    Args:
+        zoom: Коэффициент масштабирования относительно 72 DPI.
+
+    Returns:
+        Матрица масштабирования.
+    """
+    if abs(zoom - 1.0) < 1e-9:
+        return fitz.Identity
+    return fitz.Matrix(zoom, zoom)
+
+
+class _RenderedPage(NamedTuple):
+    """Сырые пиксели отрендеренной страницы."""
+
+    mode: str
+    width: int
+    height: int
+    samples: bytes
+
+
+def _render_page(
+    page: "fitz.Page",
+    matrix: "fitz.Matrix",
+    grayscale: bool = False
+) -> _RenderedPage:
+    """
+    Рендерит страницу PDF в буфер пикселей.
+
+    Альфа-канал не рендерится: WebP все равно отбрасывает его для непрозрачных
+    страниц, а без него пиксмап на четверть меньше.
+
+    Если пиксмап страницы превысил бы MAX_PIXMAP_BYTES, страница рендерится
+    горизонтальными полосами, которые копируются в общий буфер. Так в памяти
+    одновременно находятся только буфер страницы и одна полоса.
+
+    Args:
+        page: Страница PDF документа.
+        matrix: Матрица масштабирования для рендеринга.
+        grayscale: Рендерить в оттенках серого вместо RGB.
+
+    Returns:
+        Пиксели страницы. Пиксмап освобождается при выходе из функции,
+        так как samples является копией его буфера.
+    """
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    mode = "L" if grayscale else "RGB"
+
+    page_irect = (page.rect * matrix).irect
+    row_bytes = page_irect.width * colorspace.n
+    if row_bytes * page_irect.height <= MAX_PIXMAP_BYTES:
+        pix = page.get_pixmap(matrix=matrix, alpha=False, colorspace=colorspace)
+        return _RenderedPage(mode, pix.width, pix.height, pix.samples)
+
+    logger.debug(f"Рендеринг полосами: {page_irect.width}x{page_irect.height} пикселей")
+    samples = _render_page_strips(page, matrix, colorspace, page_irect)
+    return _RenderedPage(mode, page_irect.width, page_irect.height, samples)
+
+
+def _render_page_strips(
+    page: "fitz.Page",
+    matrix: "fitz.Matrix",
+    colorspace: "fitz.Colorspace",
+    page_irect: "fitz.IRect"
+) -> bytearray:
+    """
+    Рендерит страницу горизонтальными полосами в один буфер пикселей.
+
+    Геометрия совпадает с рендерингом целой страницы, но сглаживание линий
+    и текста рядом с границами полос может отличаться на несколько оттенков
+    (до ~31/255), поэтому результат не побайтово идентичен.
+
+    Args:
+        page: Страница PDF документа.
+        matrix: Матрица масштабирования для рендеринга.
+        colorspace: Цветовое пространство пиксмапа.
+        page_irect: Границы страницы в пикселях после масштабирования.
+
+    Returns:
+        Пиксели всей страницы построчно, без выравнивания строк.
+    """
+    n = colorspace.n
+    width, height = page_irect.width, page_irect.height
+    row_bytes = width * n
+    samples = bytearray(row_bytes * height)
+    rows_per_strip = max(1, STRIP_PIXMAP_BYTES // row_bytes)
+    inverse = ~matrix
+
+    for strip_y in range(page_irect.y0, page_irect.y1, rows_per_strip):
+        strip_rect = fitz.IRect(
+            page_irect.x0, strip_y,
+            page_irect.x1, min(strip_y + rows_per_strip, page_irect.y1)
+        )
+        clip = fitz.Rect(strip_rect) * inverse
+        pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False, colorspace=colorspace)
+        strip = pix.samples_mv
+
+        # Из-за округления полоса может выходить за свои границы на пиксель,
+        # поэтому копируются только строки и столбцы, попадающие на страницу
+        src_x = max(0, page_irect.x0 - pix.x)
+        dst_x = max(0, pix.x - page_irect.x0)
+        copy_bytes = min(width - dst_x, pix.width - src_x) * n
+        for row in range(pix.height):
+            dst_row = pix.y + row - page_irect.y0
+            if 0 <= dst_row < height:
+                src_offset = row * pix.stride + src_x * n
+                dst_offset = dst_row * row_bytes + dst_x * n
+                samples[dst_offset:dst_offset + copy_bytes] = \
+                    strip[src_offset:src_offset + copy_bytes]
+
+    return samples
+
+
+def _encode_lossless_native(rendered: _RenderedPage, quality: int, method: int) -> bytes:
+    """
+    Кодирует RGB пиксели в lossless WebP напрямую через libwebp.
+
+    Буфер страницы передается в libwebp без промежуточного PIL Image.
+
+    Args:
+        rendered: Пиксели страницы в режиме RGB.
+        quality: Усилие сжатия от 0 до 100.
+        method: Метод сжатия WebP от 0 до 6.
+
+    Returns:
+        Содержимое WebP файла.
+    """
+    pixels = np.frombuffer(rendered.samples, dtype=np.uint8).reshape(
+        rendered.height, rendered.width, 3
+    )
+    picture = webp.WebPPicture.from_numpy(pixels, pilmode="RGB")
+    config = webp.WebPConfig.new(lossless=True, quality=quality, method=method)
+    return bytes(picture.encode(config).buffer())
+
+
+def _encode_page(
+    rendered: _RenderedPage,
+    quality: int,
+    method: int,
+    lossless: bool
+) -> memoryview:
+    """
+    Кодирует страницу в WebP в памяти.
+
+    Выполняется в потоке: libwebp отпускает GIL во время кодирования,
+    поэтому несколько страниц кодируются действительно параллельно.
+    Lossless RGB страницы кодируются через пакет webp, если он установлен,
+    иначе через Pillow.
+
+    Args:
+        rendered: Пиксели страницы.
+        quality: Качество WebP сжатия от 0 до 100.
+        method: Метод сжатия WebP от 0 до 6.
+        lossless: Использовать lossless сжатие WebP.
+
+    Returns:
+        Содержимое WebP файла.
+    """
+    if lossless and webp is not None and rendered.mode == "RGB":
+        return memoryview(_encode_lossless_native(rendered, quality, method))
+
+    # Конвертация в PIL Image напрямую из буфера пикселей, без PNG.
+    # frombuffer использует буфер без копирования там, где Pillow это умеет
+    # (режим L); для RGB Pillow хранит 4 байта на пиксель и копирует данные.
+    # Pixmap.pil_save делает то же самое (frombytes + save), но требует доступа
+    # к пиксмапу из потока кодирования, а объекты MuPDF не потокобезопасны.
+    img = Image.frombuffer(
+        rendered.mode, (rendered.width, rendered.height), rendered.samples,
+        "raw", rendered.mode, 0, 1
+    )
+    buf = io.BytesIO()
+    try:
+        save_kwargs = {"method": method, "quality": quality}
+        if lossless:
+            # В lossless режиме quality задает баланс скорость/размер (как cwebp -q)
+            save_kwargs["lossless"] = True
+        img.save(buf, 'WebP', **save_kwargs)
+    finally:
+        # Явное освобождение буфера страницы, чтобы память не росла от страницы к странице
+        img.close()
+
+    return buf.getbuffer()
+
+
+def _file_writer(write_queue: "queue.Queue", written_files: List[Path]) -> None:
+    """
+    Записывает закодированные страницы на диск в отдельном потоке.
+
+    Создание и запись файлов (особенно на сетевых дисках) не задерживают
+    кодирование следующих страниц. Каждый файл сначала пишется в {путь}.part
+    и затем переименовывается. Поток завершается, получив None.
+
+    Args:
+        write_queue: Очередь кортежей (номер страницы, путь, данные).
+                    Данные равны None для уже существующих файлов: они только
+                    добавляются в результаты, чтобы сохранить порядок страниц.
+        written_files: Список, в который добавляются успешно записанные пути.
+    """
+    while True:
+        item = write_queue.get()
+        if item is None:
+            return
+
+        page_num, output_path, data = item
+        if data is None:
+            written_files.append(Path(output_path))
+            continue
+
+        try:
+            # Запись во временный файл и атомарная замена: прерванная запись
+            # не оставит на месте результата обрезанный файл, который
+            # --resume принял бы за готовый
+            part_path = output_path + ".part"
+            with open(part_path, 'wb') as output_file:
+                output_file.write(data)
+            os.replace(part_path, output_path)
+            # Path создается только для итогового списка результатов
+            written_files.append(Path(output_path))
+            logger.debug(f"Сохранено: {output_path}")
+        except Exception as e:
+            logger.error(f"Ошибка записи страницы {page_num + 1}: {e}")
+
+
+def _existing_outputs(output_dir: Path) -> Set[str]:
+    """
+    Находит непустые WebP файлы в выходной директории одним проходом.
+
+    Args:
+        output_dir: Директория для сохранения WebP файлов.
+
+    Returns:
+        Множество путей к существующим WebP файлам в том же виде,
+        в котором их формирует шаблон имени страницы.
+    """
+    with os.scandir(output_dir) as entries:
+        return {
+            entry.path
+            for entry in entries
+            if entry.name.endswith('.webp') and entry.is_file() and entry.stat().st_size > 0
+        }
+
+
+def _render_page_range(
+    pdf_path: Path,
+    page_indices: range,
+    zoom: float,
+    quality: int,
+    method: int,
+    lossless: bool,
+    grayscale: bool,
+    auto_dpi: bool,
+    resume: bool,
+    output_dir: Path
+) -> List[Path]:
+    """
+    Рендерит диапазон страниц PDF в WebP файлы.
+
+    Функция открывает PDF самостоятельно, поэтому может выполняться
+    в отдельном процессе: объекты fitz.Document и fitz.Page не сериализуются.
+
+    Рендеринг и кодирование образуют конвейер: пока страница N кодируется
+    в WebP в пуле потоков, основной поток уже рендерит страницу N+1.
+    Одновременно обрабатывается не больше ENCODE_THREADS страниц, и их пиксели
+    вместе с рендерящейся страницей не превышают MAX_PENDING_BYTES (одна страница
+    допускается всегда), поэтому на большом DPI конвейер не умножает
+    потребление памяти.
+    Готовые WebP данные записываются на диск отдельным потоком.
+
+    Args:
+        pdf_path: Путь к PDF файлу.
+        page_indices: Диапазон индексов страниц (с нуля) для обработки.
+        zoom: Коэффициент масштабирования относительно 72 DPI.
+        quality: Качество WebP сжатия от 0 до 100.
+        method: Метод сжатия WebP от 0 до 6.
+        lossless: Использовать lossless сжатие WebP.
+        grayscale: Рендерить страницы в оттенках серого.
+        auto_dpi: Ограничивать DPI разрешением встроенного скана.
+        resume: Пропускать страницы, для которых WebP файл уже существует.
+        output_dir: Директория для сохранения WebP файлов.
+
+    Returns:
+        Список путей к созданным WebP файлам.
+    """
+    _lazy_imports()
+
+    converted_files: List[Path] = []
+    matrix = _zoom_matrix(zoom)
+    pending: Deque[Tuple[int, str, Optional[Future], int]] = deque()
+    pending_bytes = 0
+    in_flight = 0
+    write_queue: "queue.Queue" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    # Префикс пути строится один раз, без создания Path на каждую страницу.
+    # Это не шаблон str.format, поэтому фигурные скобки в пути не мешают.
+    output_prefix = os.path.join(str(output_dir), "")
+    existing_files = _existing_outputs(output_dir) if resume else set()
+    capped_pages = 0
+
+    def collect_oldest() -> None:
+        nonlocal pending_bytes, in_flight
+        page_num, output_path, future, nbytes = pending.popleft()
+        if future is not None:
+            pending_bytes -= nbytes
+            in_flight -= 1
+        try:
+            data = future.result() if future is not None else None
+            write_queue.put((page_num, output_path, data))
+        except Exception as e:
+            logger.error(f"Ошибка обработки страницы {page_num + 1}: {e}")
+
+    doc = fitz.open(str(pdf_path))
+    writer = threading.Thread(
+        target=_file_writer, args=(write_queue, converted_files), daemon=True
+    )
+    writer.start()
+    try:
+        total_pages = len(doc)
+
+        encoder = ThreadPoolExecutor(max_workers=ENCODE_THREADS)
+        try:
+            # doc.pages продвигается по дереву страниц последовательно,
+            # а не ищет каждую страницу заново, как doc[page_num]
+            pages = doc.pages(page_indices.start, page_indices.stop, page_indices.step)
+            for page_num, page in zip(page_indices, pages):
+                try:
+                    if (page_num - page_indices.start) % PROGRESS_LOG_INTERVAL == 0:
+                        last_page = min(page_num + PROGRESS_LOG_INTERVAL, page_indices.stop)
+                        logger.info(
+                            f"Обрабатываем страницы {page_num + 1}-{last_page}/{total_pages}..."
+                        )
+                    # Формирование имени выходного файла
+                    output_path = output_prefix + f"{page_num + 1:02d}.webp"
+
+                    if output_path in existing_files:
+                        logger.debug(f"Пропуск (уже существует): {output_path}")
+                        pending.append((page_num, output_path, None, 0))
+                        continue
+
+                    logger.debug(f"Обрабатываем страницу {page_num + 1}/{total_pages}...")
+
+                    # Для сканов нет смысла рендерить выше разрешения изображения
+                    page_matrix = matrix
+                    if auto_dpi:
+                        page_zoom = _effective_zoom(page, zoom)
+                        if page_zoom < zoom:
+                            capped_pages += 1
+                            logger.debug(
+                                f"Страница {page_num + 1}: DPI ограничен до "
+                                f"{page_zoom * DEFAULT_ZOOM_BASE:.0f} по разрешению скана"
+                            )
+                            page_matrix = _zoom_matrix(page_zoom)
+
+                    # Рендеринг страницы в изображение
+                    # Ограничение конвейера до рендеринга: ждем кодирования старых
+                    # страниц, чтобы вместе с новой не держать в памяти слишком
+                    # много пикселей. На большом DPI страницы идут последовательно.
+                    page_irect = (page.rect * page_matrix).irect
+                    nbytes = page_irect.width * page_irect.height * (1 if grayscale else 3)
+                    while in_flight and (
+                        in_flight >= ENCODE_THREADS
+                        or pending_bytes + nbytes > MAX_PENDING_BYTES
+                    ):
+                        collect_oldest()
+
+                    rendered = _render_page(page, page_matrix, grayscale)
+
+                    # Кодирование в WebP формат в фоновом потоке
+                    future = encoder.submit(_encode_page, rendered, quality, method, lossless)
+                    pending.append((page_num, output_path, future, nbytes))
+                    pending_bytes += nbytes
+                    in_flight += 1
+                    del rendered
+
+                except Exception as e:
+                    logger.error(f"Ошибка обработки страницы {page_num + 1}: {e}")
+                    continue
+
+            while pending:
+                collect_oldest()
+
+            if capped_pages:
+                logger.info(
+                    f"Страниц с DPI, ограниченным по разрешению скана: "
+                    f"{capped_pages}/{len(page_indices)}"
+                )
+
+        except BaseException:
+            # При прерывании не ждем кодирования страниц, которые уже не будут записаны
+            for _, _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+            encoder.shutdown(wait=False)
+            raise
+
+        encoder.shutdown()
+
+    finally:
+        # Дожидаемся записи всех файлов
+        write_queue.put(None)
+        writer.join()
+
+        # Сброс внутреннего кэша MuPDF, который иначе удерживает память после рендеринга
+        fitz.TOOLS.store_shrink(100)
+        doc.close()
+        _flush_logs()
+
+    return converted_files
+
 
 def pdf_to_webp(
     pdf_path: Path,
     output_dir: Optional[Path] = None,
     dpi: int = DEFAULT_DPI,
     quality: int = DEFAULT_QUALITY,
-    lossless: bool = False
+    method: int = DEFAULT_METHOD,
+    lossless: bool = False,
+    grayscale: bool = False,
+    auto_dpi: bool = True,
+    jobs: Optional[int] = None,
+    resume: bool = False
 ) -> List[Path]:
     """
     Конвертирует PDF в WebP изображения.
@@ -140,8 +722,19 @@ def pdf_to_webp(
                    создается директория с именем {имя_файла}_webp рядом с PDF.
         dpi: Разрешение в DPI для рендеринга страниц. По умолчанию 300.
         quality: Качество WebP сжатия от 0 до 100. По умолчанию 90.
-                Игнорируется, если lossless=True.
+                При lossless=True определяет усилие сжатия: больше - меньше файл,
+                но дольше кодирование.
+        method: Метод сжатия WebP от 0 (быстро) до 6 (медленно, меньше размер).
+               По умолчанию 4.
         lossless: Использовать lossless сжатие WebP. По умолчанию False.
+        grayscale: Рендерить страницы в оттенках серого. Вдвое уменьшает объем
+                  данных для сканов текста. По умолчанию False.
+        auto_dpi: Не рендерить сканированные страницы с DPI выше разрешения
+                 встроенного изображения (с запасом 20%). По умолчанию True.
+        jobs: Число процессов для параллельной обработки страниц.
+             По умолчанию равно числу ядер процессора.
+        resume: Не конвертировать заново страницы, для которых непустой
+               WebP файл уже есть в выходной директории. По умолчанию False.
 
     Returns:
         Список путей к созданным WebP файлам.
@@ -151,8 +744,10 @@ def pdf_to_webp(
         ValueError: Если параметры некорректны.
         RuntimeError: Если произошла ошибка при обработке PDF.
     """
-    # Валидация входных параметров
-    validate_parameters(dpi, quality)
+    # Валидация входных параметров до загрузки тяжелых модулей
+    validate_parameters(dpi, quality, method, jobs)
+
+    _lazy_imports()
 
     # Проверка существования файла
     if not pdf_path.exists():
@@ -181,58 +776,186 @@ def pdf_to_webp(
 
     try:
         total_pages = len(doc)
-        logger.info(f"Найдено страниц: {total_pages}")
+    finally:
+        doc.close()
 
-        if total_pages == 0:
-            raise ValueError("PDF файл не содержит страниц")
+    logger.info(f"Найдено страниц: {total_pages}")
 
-        # Конвертация каждой страницы
-        converted_files: List[Path] = []
-        zoom = dpi / DEFAULT_ZOOM_BASE
-        matrix = fitz.Matrix(zoom, zoom)
+    if total_pages == 0:
+        raise ValueError("PDF файл не содержит страниц")
 
-        for page_num in range(total_pages):
-            try:
-                logger.info(f"Обрабатываем страницу {page_num + 1}/{total_pages}...")
+    # Конвертация страниц
+    converted_files: List[Path] = []
+    zoom = dpi / DEFAULT_ZOOM_BASE
+    n_workers = min(jobs or os.cpu_count() or 1, total_pages)
 
-                # Получение страницы
-                page = doc[page_num]
+    if total_pages < MIN_PAGES_FOR_PARALLEL or n_workers < 2:
+        # Для коротких документов запуск пула процессов дороже самой конвертации
+        converted_files = _render_page_range(
+            pdf_path, range(total_pages), zoom, quality, method,
+            lossless, grayscale, auto_dpi, resume, output_dir
+        )
+    else:
+        chunk_size = math.ceil(total_pages / n_workers)
+        page_ranges = [
+            range(start, min(start + chunk_size, total_pages))
+            for start in range(0, total_pages, chunk_size)
+        ]
+        logger.info(f"Параллельная обработка: {len(page_ranges)} процессов")
+        # Буфер лога выводится до запуска процессов, иначе fork скопирует его в каждый
+        _flush_logs()
+
+        with ProcessPoolExecutor(
+            max_workers=len(page_ranges),
+            initializer=_init_worker,
+            initargs=(logging.getLogger().level,)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _render_page_range,
+                    pdf_path, page_range, zoom, quality, method,
+                    lossless, grayscale, auto_dpi, resume, output_dir
+                ): chunk_idx
+                for chunk_idx, page_range in enumerate(page_ranges)
+            }
+            # Результаты собираются по мере готовности, но сохраняют порядок страниц
+            chunk_results: List[List[Path]] = [[] for _ in page_ranges]
+            for future in as_completed(futures):
+                chunk_results[futures[future]] = future.result()
+
+        for chunk_files in chunk_results:
+            converted_files.extend(chunk_files)
+
+    logger.info("Конвертация завершена!")
+    logger.info(f"Обработано страниц: {len(converted_files)}/{total_pages}")
+    logger.info(f"Файлы сохранены в: {output_dir}")
+
+    if len(converted_files) == 0:
+        raise RuntimeError("Не удалось обработать ни одной страницы")
+
+    return converted_files
+
+
+def _batch_worker(
+    pdf_path: Path,
+    output_dir: Optional[Path],
+    dpi: int,
+    quality: int,
+    method: int,
+    lossless: bool,
+    grayscale: bool,
+    auto_dpi: bool,
+    resume: bool
+) -> List[Path]:
+    """
+    Конвертирует один PDF в процессе пакетного пула.
 
-                # Рендеринг страницы в изображение
-                pix = page.get_pixmap(matrix=matrix)
+    Страницы внутри файла обрабатываются последовательно: параллелизм уже
+    обеспечен на уровне файлов. Буфер лога выводится до возврата в пул.
+    После прерывания процесс отклоняет оставшиеся в его очереди файлы.
+    """
+    global _batch_interrupted
+    if _batch_interrupted:
+        raise KeyboardInterrupt
+    try:
+        return pdf_to_webp(
+            pdf_path, output_dir, dpi, quality, method,
+            lossless, grayscale, auto_dpi, jobs=1, resume=resume
+        )
+    except KeyboardInterrupt:
+        _batch_interrupted = True
+        raise
+    finally:
+        _flush_logs()
 
-                # Конвертация в PIL Image
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
 
-                # Формирование имени выходного файла
-                output_filename = f"{page_num + 1:02d}.webp"
-                output_path = output_dir / output_filename
+def batch_convert(
+    pdf_paths: List[Path],
+    output_dir: Optional[Path] = None,
+    dpi: int = DEFAULT_DPI,
+    quality: int = DEFAULT_QUALITY,
+    method: int = DEFAULT_METHOD,
+    lossless: bool = False,
+    grayscale: bool = False,
+    auto_dpi: bool = True,
+    jobs: Optional[int] = None,
+    resume: bool = False
+) -> Dict[Path, List[Path]]:
+    """
+    Конвертирует несколько PDF файлов в WebP через один общий пул процессов.
 
-                # Сохранение в WebP формате
-                if lossless:
-                    img.save(output_path, 'WebP', lossless=True)
-                else:
-                    img.save(output_path, 'WebP', quality=quality, method=WEBP_METHOD)
+    Каждый PDF обрабатывается целиком в отдельном процессе пула, поэтому
+    запуск интерпретатора и импорт PyMuPDF выполняются один раз на процесс,
+    а не на каждый файл. Ошибка в одном файле не прерывает обработку остальных.
 
-                converted_files.append(output_path)
-                logger.debug(f"Сохранено: {output_path}")
+    Args:
+        pdf_paths: Список путей к PDF файлам.
+        output_dir: Общая директория для результатов. Если указана, WebP файлы
+                   каждого PDF сохраняются в поддиректорию {имя_файла}_webp.
+                   Если не указана, поддиректории создаются рядом с PDF.
+        dpi: Разрешение в DPI для рендеринга страниц.
+        quality: Качество WebP сжатия от 0 до 100.
+        method: Метод сжатия WebP от 0 до 6.
+        lossless: Использовать lossless сжатие WebP.
+        grayscale: Рендерить страницы в оттенках серого.
+        auto_dpi: Ограничивать DPI разрешением встроенного скана.
+        jobs: Число одновременно обрабатываемых файлов.
+             По умолчанию равно числу ядер процессора.
+        resume: Пропускать страницы, для которых WebP файл уже существует.
 
-            except Exception as e:
-                logger.error(f"Ошибка обработки страницы {page_num + 1}: {e}")
-                continue
+    Returns:
+        Словарь {путь к PDF: список созданных WebP файлов} для успешно
+        обработанных файлов.
 
-        logger.info(f"Конвертация завершена!")
-        logger.info(f"Обработано страниц: {len(converted_files)}/{total_pages}")
-        logger.info(f"Файлы сохранены в: {output_dir}")
+    Raises:
+        ValueError: Если список файлов пуст или параметры некорректны.
+    """
+    if not pdf_paths:
+        raise ValueError("Список PDF файлов пуст")
 
-        if len(converted_files) == 0:
-            raise RuntimeError("Не удалось обработать ни одной страницы")
+    validate_parameters(dpi, quality, method, jobs)
 
-        return converted_files
+    # Импорт до запуска пула: процессы, созданные через fork, получат готовые модули
+    _lazy_imports()
 
-    finally:
-        doc.close()
+    n_workers = min(jobs or os.cpu_count() or 1, len(pdf_paths))
+    logger.info(f"Пакетная обработка: {len(pdf_paths)} файлов, {n_workers} процессов")
+    _flush_logs()
+
+    results: Dict[Path, List[Path]] = {}
+    executor = ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(logging.getLogger().level,)
+    )
+    futures = {}
+    try:
+        for pdf_path in pdf_paths:
+            pdf_output_dir = output_dir / f"{pdf_path.stem}_webp" if output_dir else None
+            future = executor.submit(
+                _batch_worker, pdf_path, pdf_output_dir, dpi, quality, method,
+                lossless, grayscale, auto_dpi, resume
+            )
+            futures[future] = pdf_path
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            pdf_path = futures[future]
+            try:
+                results[pdf_path] = future.result()
+                logger.info(f"[{done}/{len(pdf_paths)}] Готово: {pdf_path.name}")
+            except Exception as e:
+                logger.error(f"[{done}/{len(pdf_paths)}] Ошибка обработки {pdf_path.name}: {e}")
+    except BaseException:
+        # При прерывании (Ctrl+C) файлы из очереди не запускаются, а пул
+        # закрывается без ожидания: иначе выход из with дождался бы всей пачки.
+        # cancel_futures у shutdown появился только в Python 3.9.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+
+    return results
 
 
 def resolve_pdf_path(pdf_path_arg: Optional[str]) -> Path:
@@ -274,7 +997,7 @@ def resolve_pdf_path(pdf_path_arg: Optional[str]) -> Path:
         )
 
     if len(pdf_files) == 1:
-        selected_file = pdf_files[0]
+        selected_file = pdf_files[0].path
         logger.info(f"Найден один PDF файл, используем: {selected_file.name}")
         return selected_file.resolve()
 
@@ -293,6 +1016,7 @@ def main() -> None:
   %(prog)s document.pdf -o output_folder
   %(prog)s document.pdf -d 600 -q 95
   %(prog)s document.pdf --lossless
+  %(prog)s --batch pdf_folder -j 4
   %(prog)s                    # Автоматический поиск PDF в текущей директории
         """
     )
@@ -323,12 +1047,51 @@ def main() -> None:
         help=f"Качество WebP от 0 до 100 (по умолчанию {DEFAULT_QUALITY})"
     )
 
+    parser.add_argument(
+        "-m", "--method",
+        type=int,
+        default=DEFAULT_METHOD,
+        choices=range(7),
+        help=f"Метод сжатия WebP от 0 (быстро) до 6 (медленно) (по умолчанию {DEFAULT_METHOD})"
+    )
+
     parser.add_argument(
         "-l", "--lossless",
         action="store_true",
         help="Использовать lossless сжатие WebP"
     )
 
+    parser.add_argument(
+        "-g", "--grayscale",
+        action="store_true",
+        help="Рендерить страницы в оттенках серого (для сканов текста)"
+    )
+
+    parser.add_argument(
+        "--no-auto-dpi",
+        dest="auto_dpi",
+        action="store_false",
+        help="Не ограничивать DPI разрешением встроенных сканов"
+    )
+
+    parser.add_argument(
+        "-b", "--batch",
+        action="store_true",
+        help="Обработать все PDF файлы в директории (pdf_path или текущей)"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Число параллельных процессов (по умолчанию - число ядер)"
+    )
+
+    parser.add_argument(
+        "-r", "--resume",
+        action="store_true",
+        help="Пропускать страницы, для которых WebP файл уже существует"
+    )
+
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -342,21 +1105,62 @@ def main() -> None:
         logging.getLogger().setLevel(logging.DEBUG)
 
     try:
-        # Разрешение пути к PDF
-        pdf_path = resolve_pdf_path(args.pdf_path)
-
         # Определение выходной директории
         output_dir = Path(args.output) if args.output else None
 
+        if args.batch:
+            pdf_files = find_pdf_files(Path(args.pdf_path or '.'))
+            if not pdf_files:
+                raise FileNotFoundError(
+                    f"PDF файлы не найдены в директории: {args.pdf_path or Path.cwd()}"
+                )
+
+            results = batch_convert(
+                pdf_paths=[pdf_file.path for pdf_file in pdf_files],
+                output_dir=output_dir,
+                dpi=args.dpi,
+                quality=args.quality,
+                method=args.method,
+                lossless=args.lossless,
+                grayscale=args.grayscale,
+                auto_dpi=args.auto_dpi,
+                jobs=args.jobs,
+                resume=args.resume
+            )
+            if not results:
+                raise RuntimeError("Не удалось обработать ни одного PDF файла")
+
+            total_pages = sum(len(files) for files in results.values())
+            _flush_logs()
+            if len(results) < len(pdf_files):
+                # Частичный сбой: итог выводится, но код возврата ненулевой,
+                # чтобы скрипты и CI могли его обнаружить
+                print(f"\n⚠️ Конвертировано {len(results)}/{len(pdf_files)} файлов "
+                      f"({total_pages} страниц), остальные завершились с ошибкой")
+                sys.exit(1)
+
+            print(f"\n✅ Успешно конвертировано {len(results)}/{len(pdf_files)} файлов "
+                  f"({total_pages} страниц)!")
+            return
+
+        # Разрешение пути к PDF
+        pdf_path = resolve_pdf_path(args.pdf_path)
+
         # Конвертация
         converted_files = pdf_to_webp(
             pdf_path=pdf_path,
             output_dir=output_dir,
             dpi=args.dpi,
             quality=args.quality,
-            lossless=args.lossless
+            method=args.method,
+            lossless=args.lossless,
+            grayscale=args.grayscale,
+            auto_dpi=args.auto_dpi,
+            jobs=args.jobs,
+            resume=args.resume
         )
 
+        _flush_logs()
         print(f"\n✅ Успешно конвертировано {len(converted_files)} страниц!")
         print(f"📁 Файлы сохранены в: {converted_files[0].parent}")
 